@@ -1,14 +1,15 @@
 import streamlit as st
-import pandas as pd
 import ollama
 from typing import Optional
-import html
+from markupsafe import escape
+import io
 import re
-import requests
-import subprocess
 import json
-import configparser
 import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
 
 # st page config
 st.set_page_config(
@@ -26,12 +27,15 @@ st.set_page_config(
 if 'results' not in st.session_state:
     st.session_state.results = {}
     
+if 'result_lengths' not in st.session_state:
+    st.session_state.result_lengths = {}
+    
+if 'error_count' not in st.session_state:
+    st.session_state.error_count = 0
+    
 if 'debug_info' not in st.session_state:
     st.session_state.debug_info = []
 
-if 'current_streaming_text' not in st.session_state:
-    st.session_state.current_streaming_text = ""
-
 if 'inference_running' not in st.session_state:
     st.session_state.inference_running = False
 
@@ -50,15 +54,79 @@ if 'remove_status' not in st.session_state:
 # Define helper functions first before using them 
 CONFIG_PATH = os.path.join(os.path.expanduser("~"), ".llm_suite_profiles.ini")
 
-def load_profiles():
+@st.cache_resource
+def get_profile_store():
+    # one config shared by every session, read from disk once; a save can't write a stale copy
+    # over profiles another session has changed since
+    import configparser  # only needed for profiles, so kept off the startup path
     config = configparser.ConfigParser()
     if os.path.exists(CONFIG_PATH):
         config.read(CONFIG_PATH)
-    return config
+    # sessions run on their own script threads, so every mutate + save of the config holds this lock
+    store = {"config": config, "lock": threading.RLock()}
+    index_profiles(store)
+    return store
+
+def load_profiles():
+    return get_profile_store()["config"]
+
+# seconds to wait for further profile changes before writing the file
+PROFILE_SAVE_DELAY = 0.25
+
+@st.cache_resource
+def get_profile_writer():
+    # shared across reruns so back-to-back saves are coalesced into one write
+    # "error" holds the last failed write; the writer is process-wide, so it is shown (and cleared)
+    # by whichever session renders the Settings tab next, not necessarily the one that saved
+    return {"lock": threading.Lock(), "timer": None, "pending": None, "error": None}
+
+def flush_profiles(writer):
+    with writer["lock"]:
+        contents = writer["pending"]
+        writer["pending"] = None
+        writer["timer"] = None
+        if contents is None:
+            return
+        # write a temp file and swap it in, so the profiles file is never left half-written
+        tmp_path = CONFIG_PATH + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                f.write(contents)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, CONFIG_PATH)
+            # a later successful write supersedes an earlier failure
+            writer["error"] = None
+        except OSError as e:
+            # this runs on a timer thread, so keep the error for the UI instead of raising it
+            writer["error"] = f"Error saving profiles to {CONFIG_PATH}: {str(e)}"
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
 
 def save_profiles(config):
-    with open(CONFIG_PATH, "w") as f:
-        config.write(f)
+    store = get_profile_store()
+    # re-entrant, so callers can hold it across their change and this save
+    with store["lock"]:
+        buffer = io.StringIO()
+        config.write(buffer)
+        index_profiles(store)
+    writer = get_profile_writer()
+    with writer["lock"]:
+        writer["pending"] = buffer.getvalue()
+        if writer["timer"] is not None:
+            writer["timer"].cancel()
+        writer["timer"] = threading.Timer(PROFILE_SAVE_DELAY, flush_profiles, args=(writer,))
+        writer["timer"].start()
+
+def index_profiles(store):
+    # profile names and the default's selectbox index, recomputed only when profiles are loaded or saved
+    config = store["config"]
+    profile_names = [s for s in config.sections() if s != "DEFAULT"]
+    default_profile = config["DEFAULT"].get("default_profile", "") if "DEFAULT" in config else ""
+    store["profile_names"] = profile_names
+    store["default_idx"] = profile_names.index(default_profile) + 1 if default_profile in profile_names else 0
 
 # --- Auto-load default profile on startup - MOVED TO TOP ---
 # This needs to be before any widgets are created
@@ -112,96 +180,130 @@ st.markdown("""
 
 st.markdown("<h1 class='title'>LLM Suite</h1>", unsafe_allow_html=True)
 
+# one Ollama client for the whole server, so its HTTP connection pool stays warm across reruns
+@st.cache_resource
+def get_ollama_client():
+    return ollama.Client()
+
+# resolved here on the script thread; inference worker threads use this reference directly
+ollama_client = get_ollama_client()
+
 # get list of available models with details
-@st.cache_data(ttl=300)  # cache for 5 mins
-def get_available_models():
-    try:
-        response = ollama.list()
-        models_info = []
-        model_names = set()  # track unique base model names
+# cached until invalidate_available_models() is called after a model is pulled or removed
+@st.cache_resource
+def fetch_available_models():
+    response = ollama_client.list()
+    models_info = []
+    
+    for model in response.models:
+        # parse model name and version if present (format: model:version)
+        full_name = model.model
+        if ":" in full_name:
+            base_name, version = full_name.split(":", 1)
+        else:
+            base_name, version = full_name, "latest"
         
-        for model in response.models:
-            # parse model name and version if present (format: model:version)
-            full_name = model.model
-            if ":" in full_name:
-                base_name, version = full_name.split(":", 1)
-            else:
-                base_name, version = full_name, "latest"
-            
-            # Add base name to unique set
-            model_names.add(base_name)
-            
-            model_info = {
-                "name": full_name,  # full name with version
-                "base_name": base_name,  # base model name
-                "version": version,  # version tag
-                "size_mb": round(model.size.real / 1024 / 1024, 2)
-            }
-
-            if model.details:
-                model_info["format"] = model.details.format
-                model_info["family"] = model.details.family
-                model_info["parameter_size"] = model.details.parameter_size
-                model_info["quantization_level"] = model.details.quantization_level
-            models_info.append(model_info)
+        model_info = {
+            "name": full_name,  # full name with version
+            "base_name": base_name,  # base model name
+            "version": version,  # version tag
+            "size_mb": round(model.size.real / 1024 / 1024, 2)
+        }
+
+        if model.details:
+            model_info["format"] = model.details.format
+            model_info["family"] = model.details.family
+            model_info["parameter_size"] = model.details.parameter_size
+            model_info["quantization_level"] = model.details.quantization_level
         
-        # sort models by base name and then by version
-        models_info.sort(key=lambda x: (x["base_name"], x["version"]))
-            
-        return list(model_names), models_info
-    except Exception as e:
-        st.error(f"Error connecting to Ollama: {e}")
-        return [], []
+        # checkbox tooltip, built here so it isn't reformatted on every rerun
+        model_info["help_text"] = f"""
+                        Base Model: {model_info['base_name']}
+                        Version: {model_info['version']}
+                        Size: {model_info['size_mb']} MB
+                        Family: {model_info.get('family', '')}
+                        Parameter Size: {model_info.get('parameter_size', '')}
+                        Quantization: {model_info.get('quantization_level', '')}
+                        Format: {model_info.get('format', '')}
+                        """
+        if "format" in model_info:
+            model_info["help_text"] += f"\n{model_info['base_name']}:{model_info['version']}"
+        models_info.append(model_info)
+    
+    # sort models by base name and then by version
+    models_info.sort(key=lambda x: (x["base_name"], x["version"]))
+    
+    # look up model details by full name
+    model_info_by_name = {model_info["name"]: model_info for model_info in models_info}
+    installed_names = frozenset(model_info_by_name)
+        
+    return models_info, model_info_by_name, installed_names
 
-# Function to get available models from Ollama repository
-@st.cache_data(ttl=600)  # cache for 10 mins
-def get_ollama_available_models():
+def get_available_models():
     try:
-        response = requests.get("https://ollama.com/search", timeout=10)
-        if response.status_code == 200:
-            st.error("Unable to fetch remote model list: Ollama loads models dynamically and does not provide a public API for this. Please check https://ollama.com/library manually.")
-            return []
-        else:
-            st.error(f"Failed to fetch models: HTTP {response.status_code}")
-            return []
+        return fetch_available_models()
     except Exception as e:
-        st.error(f"Error fetching available models: {e}")
-        return []
+        # errors aren't cached, so the next rerun tries Ollama again
+        st.error(f"Error connecting to Ollama: {e}")
+        return [], {}, frozenset()
+
+def invalidate_available_models():
+    fetch_available_models.clear()
 
 # Function to download model from Ollama
 def download_model(model_name):
+    progress_bar = st.progress(0.0, text=f"Downloading {model_name}...")
     try:
-        with st.spinner(f"Downloading {model_name}... This may take a while depending on the model size."):
-            result = subprocess.run(
-                ["ollama", "pull", model_name],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            return True, result.stdout
-    except subprocess.CalledProcessError as e:
-        return False, f"Error: {e.stderr}"
+        status = ""
+        fraction = 0.0
+        for chunk in ollama_client.pull(model_name, stream=True):
+            status = chunk.get("status", "")
+            total = chunk.get("total")
+            completed = chunk.get("completed")
+            # only layer downloads report sizes; other steps just update the status text
+            if total and completed is not None:
+                fraction = min(completed / total, 1.0)
+            progress_bar.progress(fraction, text=f"{model_name}: {status}")
+        invalidate_available_models()
+        return True, status
+    except ollama.ResponseError as e:
+        return False, f"Error: {e.error}"
     except Exception as e:
         return False, f"Error: {str(e)}"
+    finally:
+        progress_bar.empty()
 
 # Function to remove model from Ollama
 def remove_model(model_name):
     try:
-        with st.spinner(f"Removing {model_name}..."):
-            result = subprocess.run(
-                ["ollama", "rm", model_name],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            return True, result.stdout
-    except subprocess.CalledProcessError as e:
-        return False, f"Error: {e.stderr}"
+        ollama_client.delete(model_name)
+        invalidate_available_models()
+        return True, f"Removed {model_name}"
+    except ollama.ResponseError as e:
+        return False, f"Error: {e.error}"
     except Exception as e:
         return False, f"Error: {str(e)}"
 
+# debug info is appended to from inference worker threads as well as the main script
+debug_info_lock = threading.Lock()
+
+# debug lines kept per run, and how many of them the debug expander shows
+MAX_DEBUG_INFO_LINES = 500
+SHOWN_DEBUG_INFO_LINES = 200
+
+def add_debug_info(message: str, debug_info: Optional[list] = None):
+    # worker threads have no Streamlit script context, so they pass in the list captured on the main thread
+    if debug_info is None:
+        debug_info = st.session_state.debug_info
+    with debug_info_lock:
+        debug_info.append(message)
+        # trimmed in place, since worker threads hold a reference to this list
+        if len(debug_info) > MAX_DEBUG_INFO_LINES:
+            del debug_info[:-MAX_DEBUG_INFO_LINES]
+
 # non-streaming inference function
-def query_model(model_name: str, prompt: str, system_prompt: Optional[str] = None, temperature: float = 0.7) -> str:
+def query_model(model_name: str, prompt: str, system_prompt: Optional[str] = None, temperature: float = 0.7,
+                debug_info: Optional[list] = None) -> str:
     try:
         # prepare parameters
         params = {
@@ -215,19 +317,33 @@ def query_model(model_name: str, prompt: str, system_prompt: Optional[str] = Non
         if system_prompt and system_prompt.strip():
             params["system"] = system_prompt
         
-        st.session_state.debug_info.append(f"Sending request to {model_name}...")
-        response = ollama.generate(**params)
+        add_debug_info(f"Sending request to {model_name}...", debug_info)
+        response = ollama_client.generate(**params)
         
         return response.response
     except Exception as e:
         error_msg = f"Exception with {model_name}: {str(e)}"
-        st.session_state.debug_info.append(error_msg)
+        add_debug_info(error_msg, debug_info)
         return f"Error: Unable to query model. {str(e)}"
 
-# streaming inference function
+# limit on concurrent model requests when OLLAMA_MAX_LOADED_MODELS isn't set
+DEFAULT_MAX_PARALLEL_REQUESTS = 8
+
+# Ollama queues requests for models beyond OLLAMA_MAX_LOADED_MODELS, so don't run more at once than that
+def get_max_parallel_requests(model_count: int) -> int:
+    max_loaded = os.environ.get("OLLAMA_MAX_LOADED_MODELS", "")
+    if max_loaded.isdigit() and int(max_loaded) > 0:
+        return min(model_count, int(max_loaded))
+    return min(model_count, DEFAULT_MAX_PARALLEL_REQUESTS)
+
+# minimum seconds between streamed display updates for a model
+STREAM_UPDATE_INTERVAL = 0.05
+
+# streaming inference function, run from a worker thread
+# partial text is pushed onto `updates` so the main thread can render it
 def query_model_streaming(model_name: str, prompt: str, system_prompt: Optional[str] = None, 
-                         temperature: float = 0.7, progress_container=None, 
-                         streaming_display=None):
+                         temperature: float = 0.7, updates: Optional[queue.Queue] = None,
+                         stop_event: Optional[threading.Event] = None, debug_info: Optional[list] = None):
     try:
         # prepare parameters
         params = {
@@ -241,406 +357,408 @@ def query_model_streaming(model_name: str, prompt: str, system_prompt: Optional[
         if system_prompt and system_prompt.strip():
             params["system"] = system_prompt
         
-        # Initialize response text
-        full_response = ""
+        # Collect response chunks; joined only when the text is needed
+        chunks = []
+        last_update = time.monotonic()
         
         # Stream the response
-        for chunk in ollama.generate(**params):
-            # Check if inference was stopped
-            if st.session_state.stop_inference:
-                break
-                
-            if chunk and 'response' in chunk:
-                text_chunk = chunk['response']
-                full_response += text_chunk
-                
-                # Update the streaming display with current text
-                if streaming_display:
-                    st.session_state.current_streaming_text = full_response
-                    streaming_display.markdown(f"<div class='model-response'>{full_response}</div>", 
-                                               unsafe_allow_html=True)
-                
-                # Update the progress text and length counter
-                if progress_container:
-                    progress_container.markdown(f"**Model:** {model_name} | Response length: {len(full_response)} characters")
+        stream = ollama_client.generate(**params)
+        try:
+            for chunk in stream:
+                # Check if inference was stopped
+                if stop_event is not None and stop_event.is_set():
+                    add_debug_info(f"Stopped streaming from {model_name}", debug_info)
+                    break
+                    
+                if chunk and 'response' in chunk:
+                    chunks.append(chunk['response'])
+                    
+                    # Hand the current text to the main thread for display, at most once per interval
+                    now = time.monotonic()
+                    if updates is not None and now - last_update >= STREAM_UPDATE_INTERVAL:
+                        updates.put((model_name, "".join(chunks)))
+                        last_update = now
+        finally:
+            # close the HTTP stream right away so Ollama stops generating for this request
+            stream.close()
+        
+        full_response = "".join(chunks)
+        
+        # Final update so the display ends on the complete text
+        if updates is not None:
+            updates.put((model_name, full_response))
         
         return full_response
     except Exception as e:
         error_msg = f"Streaming exception with {model_name}: {str(e)}"
-        st.session_state.debug_info.append(error_msg)
+        add_debug_info(error_msg, debug_info)
         return f"Error: Unable to stream from model. {str(e)}"
 
-# --- Function to evaluate model responses ---
-def evaluate_responses(evaluation_model: str, responses: dict, user_prompt: str, evaluation_prompt: str, temperature: float = 0.7) -> str:
-    try:
-        # Prepare the prompt for evaluation
-        formatted_responses = ""
-        for i, (model_name, response) in enumerate(responses.items(), 1):
-            formatted_responses += f"\n\n--- MODEL {i}: {model_name} ---\n{response}"
-        
-        full_prompt = f"""Original User Prompt: {user_prompt}
+# --- Function to build the evaluation prompt ---
+# cached since it only depends on its inputs; the evaluation request itself is never cached
+@st.cache_data(max_entries=16)
+def build_evaluation_prompt(responses: dict, user_prompt: str) -> str:
+    formatted_responses = "".join(
+        f"\n\n--- MODEL {i}: {model_name} ---\n{response}"
+        for i, (model_name, response) in enumerate(responses.items(), 1)
+    )
+    
+    return f"""Original User Prompt: {user_prompt}
 
 The following are responses from different LLM models to this prompt:
 {formatted_responses}
 
 Based on these responses, please provide your evaluation.
 """
+
+# --- Function to evaluate model responses ---
+def evaluate_responses(evaluation_model: str, responses: dict, user_prompt: str, evaluation_prompt: str, temperature: float = 0.7) -> str:
+    try:
+        # Prepare the prompt for evaluation
+        full_prompt = build_evaluation_prompt(responses, user_prompt)
         
         # Call the evaluation model
-        st.session_state.debug_info.append(f"Sending evaluation request to {evaluation_model}...")
+        add_debug_info(f"Sending evaluation request to {evaluation_model}...")
         return query_model(evaluation_model, full_prompt, evaluation_prompt, temperature)
     except Exception as e:
         error_msg = f"Evaluation exception with {evaluation_model}: {str(e)}"
-        st.session_state.debug_info.append(error_msg)
+        add_debug_info(error_msg)
         return f"Error: Unable to perform evaluation. {str(e)}"
 
-def get_installed_model_names():
-    _, models_info = get_available_models()
-    return set(model["name"] for model in models_info)
-
 def prompt_missing_models(missing_models):
-    st.warning(
+    st.toast(
         f"The following models in the loaded profile are not installed: {', '.join(missing_models)}. "
-        "Please download them or remove them from the profile."
+        "Please download them or remove them from the profile.",
+        icon="⚠️"
     )
 
-# --- Sidebar Tabs Navigation ---
-with st.sidebar:
-    st.markdown("## LLM Suite")
-    sidebar_tabs = st.tabs(["Models", "Model Management", "Settings"])
+THINK_BLOCK_RE = re.compile(r"<think>.*?</think>", re.DOTALL)
 
-    # --- Models Tab ---
-    with sidebar_tabs[0]:
-        selected_models = []
-        st.subheader("Select Models to Compare")
-        base_model_names, models_info = get_available_models()
-        if not models_info:
-            st.warning("No models found. Make sure Ollama is running.")
-        models_by_family = {}
-        model_info_by_name = {}
-        for model in models_info:
-            base_name = model["base_name"]
-            model_info_by_name[model["name"]] = model
-            if base_name not in models_by_family:
-                models_by_family[base_name] = []
-            models_by_family[base_name].append(model["name"])
-        
-        # Models to pre-select from profile (if any)
-        models_to_preselect = st.session_state.get("profile_selected_models", [])
-        
-        # Fixed key name to avoid duplicates
-        select_all = st.checkbox("Select All Models", key="select_all_models", value=False)
-        if select_all:
-            selected_models = [model["name"] for model in models_info]
-        else:
-            for base_name, versions in models_by_family.items():
-                if len(versions) == 1:
-                    with st.expander(f"{base_name} (1 version)", expanded=True):
-                        model_name = versions[0]
-                        model_info = model_info_by_name[model_name]
-                        help_text = f"""
-                        Base Model: {model_info['base_name']}
-                        Version: {model_info['version']} 
-                        Size: {model_info['size_mb']} MB
-                        Family: {model_info['family']}
-                        Parameter Size: {model_info['parameter_size']}
-                        Quantization: {model_info['quantization_level']}
-                        Format: {model_info['format']}
-                        """
-                        if "format" in model_info:
-                            help_text += f"\n{model_info['base_name']}:{model_info['version']}"
-                        
-                        # If model should be pre-selected based on profile
-                        preselect = model_name in models_to_preselect
-                        
-                        if st.checkbox(f"{model_name}", key=f"model_{model_name}", 
-                                      help=help_text, value=preselect):
-                            selected_models.append(model_name)
-                else:
-                    with st.expander(f"{base_name} ({len(versions)} versions)", expanded=True):
-                        # Check if all versions in this family should be selected
-                        family_models_in_profile = [m for m in models_to_preselect if m in versions]
-                        all_family_selected = len(family_models_in_profile) == len(versions)
-                        
-                        select_all_family = st.checkbox(
-                            f"Select all {base_name} versions",
-                            key=f"select_all_{base_name}",
-                            value=all_family_selected
-                        )
-                        if select_all_family:
-                            # If select all family is checked, add all versions
-                            selected_models.extend([version for version in versions if version not in selected_models])
-                        else:
-                            # Show individual checkboxes for each version
-                            for version in versions:
-                                model_info = model_info_by_name[version]
-                                help_text = f"""
-                                Base Model: {model_info['base_name']}
-                            Version: {model_info['version']} 
-                            Size: {model_info['size_mb']} MB
-                            Family: {model_info['family']}
-                            Parameter Size: {model_info['parameter_size']}
-                            Quantization: {model_info['quantization_level']}
-                            Format: {model_info['format']}
-                                """
-                                if "format" in model_info:
-                                    help_text += f"\n{model_info['base_name']}:{model_info['version']}"
-                                
-                                # Pre-select models from loaded profile
-                                preselect = version in models_to_preselect
-                                
-                                if st.checkbox(f"{version}", key=f"model_{version}", 
-                                              help=help_text, value=preselect):
-                                    selected_models.append(version)
-                                elif version in selected_models:
-                                    selected_models.remove(version)
-        if selected_models:
-            if len(selected_models) == 1:
-                st.info(f"Selected 1 model: {selected_models[0]}")
-            else:
-                st.info(f"Selected {len(selected_models)} models: {', '.join(selected_models)}")
-        else:
-            st.info("No models selected")
+# cached so reruns don't strip the same responses again
+@st.cache_data(max_entries=256)
+def remove_think_blocks(text: str) -> str:
+    # most responses have no think block, so skip the regex scan for them
+    if "<think>" not in text:
+        return text
+    return THINK_BLOCK_RE.sub("", text)
 
-    # --- Model Management Tab ---
-    with sidebar_tabs[1]:
-        st.subheader("Model Management")
+# escaped response panel HTML, cached so both result tabs share one rendered string per response
+@st.cache_data(max_entries=512)
+def render_response_html(text: str) -> str:
+    return f"<div class='model-response'>{escape(text)}</div>"
 
-        if st.button("Refresh Available Models", key="refresh_models"):
-            st.cache_data.clear()
-            st.session_state.download_status = None
-            st.session_state.remove_status = None
-            st.rerun()
+# Fetch the installed models once per rerun and share them between the sidebar tabs
+models_info, model_info_by_name, installed_model_names = get_available_models()
 
-        
-        # Display current installed models
-        st.markdown("#### Installed Models")
-        _, installed_models = get_available_models()
-        
-        if installed_models:
-            # Show installed models with info tooltips and checkboxes for removal
-            remove_checks = {}
-            for model in installed_models:
-                # Create the same help_text format as in the Models tab
-                help_text = f"""
-                        Base Model: {model.get('base_name','')}
-                        Version: {model.get('version','')}
-                        Size: {model.get('size_mb','')} MB
-                        Family: {model.get('family','')}
-                        Parameter Size: {model.get('parameter_size','')}
-                        Quantization: {model.get('quantization_level','')}
-                        Format: {model.get('format','')}
-                        """
-                if "format" in model:
-                    help_text += f"\n{model['base_name']}:{model['version']}"
-
-                # Use a single checkbox with help tooltip
-                remove_checks[model["name"]] = st.checkbox(
-                    f"{model['name']}", 
-                    key=f"remove_{model['name']}",
-                    help=help_text
-                )
-            # Remove button for selected models
-            selected_to_remove = [name for name, checked in remove_checks.items() if checked]
-            if selected_to_remove:
-                if st.button("Remove Selected Models", key="remove_selected_models"):
-                    errors = []
-                    for model_name in selected_to_remove:
-                        success, message = remove_model(model_name)
-                        if not success:
-                            errors.append(f"{model_name}: {message}")
-                    st.cache_data.clear()
-                    if errors:
-                        st.session_state.remove_status = {"success": False, "message": "; ".join(errors)}
-                    else:
-                        st.session_state.remove_status = {"success": True, "message": f"Successfully removed: {', '.join(selected_to_remove)}"}
-                    st.rerun()
-            # Display removal status if available
-            if st.session_state.remove_status:
-                if st.session_state.remove_status["success"]:
-                    st.success(st.session_state.remove_status["message"])
-                else:
-                    st.error(st.session_state.remove_status["message"])
-        else:
-            st.info("No installed models found")
-        
-        # Download new models section
-        st.markdown("#### Download New Models")
-        st.info("Remote model list cannot be fetched. Please visit the [Ollama Library](https://ollama.com/library) to browse available models. You can manually enter the model name to download it below.")
-        model_to_download = st.text_input(
-            "Enter model name to download (e.g., llama3, phi3, etc.)",
-            key="manual_model_download"
+# Warn about models from a just-loaded profile that aren't installed
+missing_profile_models = st.session_state.pop("missing_profile_models", None)
+if missing_profile_models:
+    prompt_missing_models(missing_profile_models)
+
+# --- Sidebar tab contents ---
+# Each tab is a fragment, so interacting with one tab reruns only that tab instead of the whole script
+
+@st.fragment
+def render_models_tab(models_info, model_info_by_name):
+    selected_models = []
+    st.subheader("Select Models to Compare")
+    if not models_info:
+        st.warning("No models found. Make sure Ollama is running.")
+
+    # Fixed key name to avoid duplicates
+    select_all = st.checkbox("Select All Models", key="select_all_models", value=False)
+    if select_all:
+        # no per-model widgets or selection bookkeeping while everything is selected
+        selected_models = [model["name"] for model in models_info]
+    else:
+        # Keep the selection to installed models, picking up a freshly loaded profile's models if there are any
+        selection = st.session_state.pop("profile_selected_models", None)
+        if selection is None:
+            selection = st.session_state.get("selected_models", [])
+        st.session_state["selected_models"] = [m for m in selection if m in model_info_by_name]
+
+        # one multiselect instead of a checkbox per model
+        selected_models = st.multiselect(
+            "Models",
+            options=[model["name"] for model in models_info],
+            format_func=lambda name: f"{name} ({model_info_by_name[name]['size_mb']} MB)",
+            help="Hover a model in the Model Management tab for its details",
+            key="selected_models"
         )
-        col1, col2 = st.columns(2)
-        with col1:
-            download_option = st.radio(
-                "Version",
-                options=["latest", "custom"],
-                key="download_option"
+    if selected_models:
+        if len(selected_models) == 1:
+            st.info(f"Selected 1 model: {selected_models[0]}")
+        else:
+            st.info(f"Selected {len(selected_models)} models: {', '.join(selected_models)}")
+    else:
+        st.info("No models selected")
+
+    # fragment reruns don't return to the script, so the Settings tab reads the selection from here
+    st.session_state["current_selected_models"] = selected_models
+    return selected_models
+
+@st.fragment
+def render_model_management_tab(models_info):
+    st.subheader("Model Management")
+
+    if st.button("Refresh Available Models", key="refresh_models"):
+        invalidate_available_models()
+        st.session_state.download_status = None
+        st.session_state.remove_status = None
+        st.rerun()
+
+
+    # Display current installed models
+    st.markdown("#### Installed Models")
+
+    if models_info:
+        # Show installed models with info tooltips and checkboxes for removal
+        remove_checks = {}
+        for model in models_info:
+            help_text = model["help_text"]
+
+            # Use a single checkbox with help tooltip
+            remove_checks[model["name"]] = st.checkbox(
+                f"{model['name']}", 
+                key=f"remove_{model['name']}",
+                help=help_text
             )
-        version_to_download = "latest"
-        if download_option == "custom":
-            with col2:
-                version_to_download = st.text_input(
-                    "Enter version",
-                    value="latest",
-                    key="version_input"
-                )
-        full_model_name = f"{model_to_download}:{version_to_download}" if model_to_download else ""
-        if model_to_download and st.button(f"Download {full_model_name}", key="download_model_button"):
-            success, message = download_model(full_model_name)
-            if success:
-                st.session_state.download_status = {"success": True, "message": f"Successfully downloaded {full_model_name}"}
-                st.cache_data.clear()
+        # Remove button for selected models
+        selected_to_remove = [name for name, checked in remove_checks.items() if checked]
+        if selected_to_remove:
+            if st.button("Remove Selected Models", key="remove_selected_models"):
+                errors = []
+                for model_name in selected_to_remove:
+                    success, message = remove_model(model_name)
+                    if not success:
+                        errors.append(f"{model_name}: {message}")
+                if errors:
+                    st.session_state.remove_status = {"success": False, "message": "; ".join(errors)}
+                else:
+                    st.session_state.remove_status = {"success": True, "message": f"Successfully removed: {', '.join(selected_to_remove)}"}
                 st.rerun()
+        # Display removal status if available
+        if st.session_state.remove_status:
+            if st.session_state.remove_status["success"]:
+                st.success(st.session_state.remove_status["message"])
             else:
-                st.session_state.download_status = {"success": False, "message": message}
-        if st.session_state.download_status:
-            if st.session_state.download_status["success"]:
-                st.success(st.session_state.download_status["message"])
-            else:
-                st.error(st.session_state.download_status["message"])
+                st.error(st.session_state.remove_status["message"])
+    else:
+        st.info("No installed models found")
 
-    # --- Settings Tab ---
-    with sidebar_tabs[2]:
-        st.subheader("Parameters")
-        # Use profile values if available for widget defaults
-        enable_streaming = st.checkbox(
-            "Enable streaming", 
-            value=st.session_state.get("enable_streaming_value", True), 
-            help="Show responses as they are generated. You'll see the text being generated in real-time.",
-            key="enable_streaming"
-        )
-        remove_think_blocks_setting = st.checkbox(
-            "Remove think blocks",
-            value=st.session_state.get("remove_think_blocks_value", False),
-            help="Remove any model thought processes from the final response",
-            key="remove_think_blocks"
-        )
-        temperature = st.slider(
-            "Temperature", 
-            min_value=0.0, 
-            max_value=2.0, 
-            value=st.session_state.get("temperature_value", 0.7), 
-            step=0.1, 
-            key="temperature"
-        )
-        
-        st.subheader("System Prompt (Optional)")
-        system_prompt = st.text_area(
-            "Enter a system prompt", 
-            value=st.session_state.get("system_prompt_value", ""), 
-            key="system_prompt"
+    # Download new models section
+    st.markdown("#### Download New Models")
+    st.info("Remote model list cannot be fetched. Please visit the [Ollama Library](https://ollama.com/library) to browse available models. You can manually enter the model name to download it below.")
+    model_to_download = st.text_input(
+        "Enter model name to download (e.g., llama3, phi3, etc.)",
+        key="manual_model_download"
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        download_option = st.radio(
+            "Version",
+            options=["latest", "custom"],
+            key="download_option"
         )
-        
-        # --- Evaluation Settings ---
-        st.subheader("Evaluation")
-        base_model_names, models_info = get_available_models()
-        model_names = [model["name"] for model in models_info]
-        
-        if model_names:
-            # Default to the first model if available, but use profile value if present
-            default_index = 0
-            if "evaluation_model_value" in st.session_state:
-                try:
-                    default_index = model_names.index(st.session_state["evaluation_model_value"])
-                except ValueError:
-                    default_index = 0
-                    
-            evaluation_model = st.selectbox(
-                "Evaluation Model", 
-                options=model_names,
-                index=default_index,
-                help="Select a model to evaluate the responses",
-                key="evaluation_model"
+    version_to_download = "latest"
+    if download_option == "custom":
+        with col2:
+            version_to_download = st.text_input(
+                "Enter version",
+                value="latest",
+                key="version_input"
             )
+    full_model_name = f"{model_to_download}:{version_to_download}" if model_to_download else ""
+    if model_to_download and st.button(f"Download {full_model_name}", key="download_model_button"):
+        success, message = download_model(full_model_name)
+        if success:
+            st.session_state.download_status = {"success": True, "message": f"Successfully downloaded {full_model_name}"}
+            st.rerun()
         else:
-            st.warning("No models available for evaluation")
-            evaluation_model = ""
+            st.session_state.download_status = {"success": False, "message": message}
+    if st.session_state.download_status:
+        if st.session_state.download_status["success"]:
+            st.success(st.session_state.download_status["message"])
+        else:
+            st.error(st.session_state.download_status["message"])
 
-        evaluation_prompt = st.text_area(
-            "Evaluation Prompt", 
-            value=st.session_state.get("evaluation_prompt_value", "Several LLMs have been queried with the same prompt. Following are their individual responses to the prompt. Please look over the responses as a whole, and determine which response(s) are the most recurring. DO NOT evaluate the prompt on your own, only find which the most common model response."),
-            key="evaluation_prompt"
-        )
+@st.fragment
+def render_settings_tab(models_info):
+    # Use profile values if available for widget defaults
+    enable_streaming = st.checkbox(
+        "Enable streaming", 
+        value=st.session_state.get("enable_streaming_value", True), 
+        help="Show responses as they are generated. You'll see the text being generated in real-time.",
+        key="enable_streaming"
+    )
+    temperature = st.slider(
+        "Temperature", 
+        min_value=0.0, 
+        max_value=2.0, 
+        value=st.session_state.get("temperature_value", 0.7), 
+        step=0.1, 
+        key="temperature"
+    )
+
+    st.subheader("System Prompt (Optional)")
+    system_prompt = st.text_area(
+        "Enter a system prompt", 
+        value=st.session_state.get("system_prompt_value", ""), 
+        key="system_prompt"
+    )
 
-        # --- Profile/Config Management ---
-        st.markdown("### Config / Profile Management")
-        config = load_profiles()
-        profile_names = [s for s in config.sections() if s != "DEFAULT"]
-        default_profile = config["DEFAULT"].get("default_profile", "") if "DEFAULT" in config else ""
-
-        # Select profile to load
-        selected_profile = st.selectbox(
-            "Select profile to load",
-            options=[""] + profile_names,
-            index=profile_names.index(default_profile) + 1 if default_profile in profile_names else 0,
-            key="profile_select"
+    # --- Evaluation Settings ---
+    st.subheader("Evaluation")
+    model_names = [model["name"] for model in models_info]
+
+    if model_names:
+        # Default to the first model if available, but use profile value if present
+        default_index = 0
+        if "evaluation_model_value" in st.session_state:
+            try:
+                default_index = model_names.index(st.session_state["evaluation_model_value"])
+            except ValueError:
+                default_index = 0
+
+        evaluation_model = st.selectbox(
+            "Evaluation Model", 
+            options=model_names,
+            index=default_index,
+            help="Select a model to evaluate the responses",
+            key="evaluation_model"
         )
+    else:
+        st.warning("No models available for evaluation")
+        evaluation_model = ""
 
-        # Profile action buttons (Load, Set Default, Delete) grouped together
-        if selected_profile:
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                if st.button("Load Profile", key="load_profile_button"):
-                    profile = config[selected_profile]
-                    loaded_models = profile.get("selected_models", "")
-                    loaded_models = [m for m in loaded_models.split(",") if m]
-                    installed_models = get_installed_model_names()
-                    missing_models = [m for m in loaded_models if m not in installed_models]
-                    if missing_models:
-                        prompt_missing_models(missing_models)
-                    
-                    # Store in session state with _value suffix
-                    st.session_state["enable_streaming_value"] = profile.getboolean("enable_streaming", True)
-                    st.session_state["temperature_value"] = float(profile.get("temperature", 0.7))
-                    st.session_state["system_prompt_value"] = profile.get("system_prompt", "")
-                    st.session_state["evaluation_model_value"] = profile.get("evaluation_model", "")
-                    st.session_state["evaluation_prompt_value"] = profile.get("evaluation_prompt", "")
-                    st.session_state["remove_think_blocks_value"] = profile.getboolean("remove_think_blocks", False)
-                    
-                    # Just store the model names to select, don't try to set checkbox states directly
-                    st.session_state["profile_selected_models"] = loaded_models
-                    st.rerun()
-            
-            with col2:
-                if st.button("Set as Default", key="set_default_profile"):
+    evaluation_prompt = st.text_area(
+        "Evaluation Prompt", 
+        value=st.session_state.get("evaluation_prompt_value", "Several LLMs have been queried with the same prompt. Following are their individual responses to the prompt. Please look over the responses as a whole, and determine which response(s) are the most recurring. DO NOT evaluate the prompt on your own, only find which the most common model response."),
+        key="evaluation_prompt"
+    )
+
+    # --- Profile/Config Management ---
+    st.markdown("### Config / Profile Management")
+    # Report a profile save that failed in the background since the last rerun
+    profile_writer = get_profile_writer()
+    if profile_writer["error"]:
+        st.error(profile_writer["error"])
+        profile_writer["error"] = None
+
+    profile_store = get_profile_store()
+    config = profile_store["config"]
+    profile_names = profile_store["profile_names"]
+    default_profile = config["DEFAULT"].get("default_profile", "") if "DEFAULT" in config else ""
+
+    # Select profile to load
+    selected_profile = st.selectbox(
+        "Select profile to load",
+        options=[""] + profile_names,
+        index=profile_store["default_idx"],
+        key="profile_select"
+    )
+
+    # Profile action buttons (Load, Set Default, Delete) grouped together
+    if selected_profile:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            if st.button("Load Profile", key="load_profile_button"):
+                profile = config[selected_profile]
+                loaded_models = profile.get("selected_models", "")
+                loaded_models = [m for m in loaded_models.split(",") if m]
+                # shown after the rerun below, which would otherwise clear it straight away
+                st.session_state["missing_profile_models"] = [m for m in loaded_models if m not in installed_model_names]
+
+                # Store in session state with _value suffix
+                st.session_state["enable_streaming_value"] = profile.getboolean("enable_streaming", True)
+                st.session_state["temperature_value"] = float(profile.get("temperature", 0.7))
+                st.session_state["system_prompt_value"] = profile.get("system_prompt", "")
+                st.session_state["evaluation_model_value"] = profile.get("evaluation_model", "")
+                st.session_state["evaluation_prompt_value"] = profile.get("evaluation_prompt", "")
+                st.session_state["remove_think_blocks_value"] = profile.getboolean("remove_think_blocks", False)
+
+                # Just store the model names to select, don't try to set checkbox states directly
+                st.session_state["profile_selected_models"] = loaded_models
+                st.rerun()
+
+        with col2:
+            if st.button("Set as Default", key="set_default_profile"):
+                with profile_store["lock"]:
                     if "DEFAULT" not in config:
                         config["DEFAULT"] = {}
                     config["DEFAULT"]["default_profile"] = selected_profile
                     save_profiles(config)
-                    st.success(f"Profile '{selected_profile}' set as default.")
-            
-            with col3:
-                if st.button("Delete Profile", key="delete_profile_button"):
+                st.success(f"Profile '{selected_profile}' set as default.")
+
+        with col3:
+            if st.button("Delete Profile", key="delete_profile_button"):
+                with profile_store["lock"]:
                     config.remove_section(selected_profile)
                     save_profiles(config)
-                    st.success(f"Profile '{selected_profile}' deleted.")
-                    st.rerun()
-
-        # Show current default and auto-load message
-        if default_profile:
-            st.info(f"Default profile: {default_profile}")
-            
-        # Save current settings as profile
-        st.markdown("#### Create New Profile")
-        new_profile_name = st.text_input("Profile name", key="profile_name_input")
-        if st.button("Save Profile", key="save_profile_button") and new_profile_name:
-            # Get current selected models
-            current_selected_models = selected_models[:]  # Make a copy
-            
-            config[new_profile_name] = {
-                "selected_models": ",".join(current_selected_models),
-                "enable_streaming": str(st.session_state.get("enable_streaming", True)),
-                "temperature": str(st.session_state.get("temperature", 0.7)),
-                "system_prompt": st.session_state.get("system_prompt", ""),
-                "evaluation_model": st.session_state.get("evaluation_model", ""),
-                "evaluation_prompt": st.session_state.get("evaluation_prompt", ""),
-                "remove_think_blocks": str(st.session_state.get("remove_think_blocks", False)),
-            }
+                st.success(f"Profile '{selected_profile}' deleted.")
+                st.rerun()
+
+    # Show current default and auto-load message
+    if default_profile:
+        st.info(f"Default profile: {default_profile}")
+
+    # Save current settings as profile
+    st.markdown("#### Create New Profile")
+    new_profile_name = st.text_input("Profile name", key="profile_name_input")
+    if st.button("Save Profile", key="save_profile_button") and new_profile_name:
+        # Get current selected models
+        current_selected_models = st.session_state.get("current_selected_models", [])[:]  # Make a copy
+
+        new_profile = {
+            "selected_models": ",".join(current_selected_models),
+            "enable_streaming": str(st.session_state.get("enable_streaming", True)),
+            "temperature": str(st.session_state.get("temperature", 0.7)),
+            "system_prompt": st.session_state.get("system_prompt", ""),
+            "evaluation_model": st.session_state.get("evaluation_model", ""),
+            "evaluation_prompt": st.session_state.get("evaluation_prompt", ""),
+            "remove_think_blocks": str(st.session_state.get("remove_think_blocks", False)),
+        }
+        with profile_store["lock"]:
+            config[new_profile_name] = new_profile
             save_profiles(config)
-            st.success(f"Profile '{new_profile_name}' saved.")
-            st.rerun()
+        st.success(f"Profile '{new_profile_name}' saved.")
+        st.rerun()
+
+    return enable_streaming, temperature, system_prompt, evaluation_model, evaluation_prompt
+
+# --- Sidebar Tabs Navigation ---
+with st.sidebar:
+    st.markdown("## LLM Suite")
+    sidebar_tabs = st.tabs(["Models", "Model Management", "Settings"])
+
+    # --- Models Tab ---
+    with sidebar_tabs[0]:
+        selected_models = render_models_tab(models_info, model_info_by_name)
+
+    # --- Model Management Tab ---
+    with sidebar_tabs[1]:
+        render_model_management_tab(models_info)
+
+    # --- Settings Tab ---
+    with sidebar_tabs[2]:
+        st.subheader("Parameters")
+        # Changes the results display directly, so it stays outside the settings fragment
+        remove_think_blocks_setting = st.checkbox(
+            "Remove think blocks",
+            value=st.session_state.get("remove_think_blocks_value", False),
+            help="Remove any model thought processes from the final response",
+            key="remove_think_blocks"
+        )
+        # picked once per run so response panels don't re-check the setting
+        prepare_response = remove_think_blocks if remove_think_blocks_setting else (lambda response: response)
+        (enable_streaming, temperature, system_prompt,
+         evaluation_model, evaluation_prompt) = render_settings_tab(models_info)
+        show_debug_info = st.toggle(
+            "Show debug information",
+            value=False,
+            help="Show request logs from the last comparison below the results",
+            key="show_debug_info"
+        )
 
 # --- Main content area ---
 st.header("Enter Your Prompt")
@@ -663,57 +781,111 @@ streaming_section = st.empty()
 def process_models(selected_models):
     # Reset debug info for this run
     st.session_state.debug_info = []
-    st.session_state.debug_info.append(f"Starting comparison with {len(selected_models)} models")
+    debug_info = st.session_state.debug_info
+    add_debug_info(f"Starting comparison with {len(selected_models)} models")
     
-    # Set up streaming if enabled
-    streaming_display = streaming_section.empty() if enable_streaming else None
+    total = len(selected_models)
+    stop_event = threading.Event()
+    updates = queue.Queue() if enable_streaming else None
     
-    # Process each model one at a time
-    for i, model in enumerate(selected_models):
-        # Check if inference was stopped
-        if st.session_state.stop_inference:
-            st.session_state.debug_info.append("Inference stopped by user")
-            break
-            
-        try:
+    # Set up one live display per model if streaming, since all models stream at once
+    streaming_displays = {}
+    if enable_streaming:
+        with streaming_section.container():
+            for model in selected_models:
+                # native markdown in a bordered container renders faster than a raw HTML div
+                with st.container(border=True):
+                    st.markdown(f"**{model}**")
+                    streaming_displays[model] = st.empty()
+    
+    progress_container.markdown(f"**Generating {total} model responses**")
+    
+    completed = 0
+    
+    # Query models concurrently; the work is waiting on Ollama, not on this process
+    executor = ThreadPoolExecutor(max_workers=get_max_parallel_requests(total))
+    futures = {}
+    try:
+        for model in selected_models:
             if enable_streaming:
-                # Display progress
-                progress_container.markdown(f"**Model {i+1}/{len(selected_models)}:** {model} | Response length: 0 characters")
-                progress_bar.progress((i) / len(selected_models))
-                
-                # Reset streaming display for next model
-                st.session_state.current_streaming_text = ""
-                
-                response = query_model_streaming(
-                    model, 
-                    user_prompt, 
-                    system_prompt, 
-                    temperature, 
-                    progress_container,
-                    streaming_display
-                )
+                future = executor.submit(query_model_streaming, model, user_prompt, system_prompt,
+                                         temperature, updates, stop_event, debug_info)
             else:
-                # Show processing message when not streaming
-                progress_container.markdown(f"**Generating {i+1}/{len(selected_models)}:** {model}")
-                progress_bar.progress((i) / len(selected_models))
-                response = query_model(model, user_prompt, system_prompt, temperature)
-            
+                future = executor.submit(query_model, model, user_prompt, system_prompt,
+                                         temperature, debug_info)
+            futures[future] = model
+        
+        def collect(future):
+            nonlocal completed
+            model = futures[future]
+            failed = False
+            try:
+                response = future.result()
+                failed = response.startswith("Error")
+            except Exception as e:
+                add_debug_info(f"Unhandled exception for {model}: {str(e)}")
+                response = f"Unhandled error: {str(e)}"
+                failed = True
+            # stored straight away so a rerun that interrupts the run keeps finished answers;
+            # the error count is updated alongside so it always matches the stored results
             st.session_state.results[model] = response
-            progress_bar.progress((i + 1) / len(selected_models))
-            
-        except Exception as e:
-            st.session_state.debug_info.append(f"Unhandled exception for {model}: {str(e)}")
-            st.session_state.results[model] = f"Unhandled error: {str(e)}"
+            st.session_state.result_lengths[model] = len(response)
+            if failed:
+                st.session_state.error_count += 1
+            completed += 1
+            # one progress message per finished model
+            progress_bar.progress(completed / total, text=f"Completed {completed}/{total}: {model}")
+        
+        if enable_streaming:
+            # local alias only saves the st.session_state lookup; reads still go through the state proxy.
+            # The Stop button ends this run by starting a new one, so stopping in-flight requests is
+            # really handled by stop_event in the finally below; this check mirrors the flag if set.
+            state = st.session_state
+            pending = set(futures)
+            while pending:
+                # Check if inference was stopped
+                if state.stop_inference and not stop_event.is_set():
+                    add_debug_info("Inference stopped by user")
+                    stop_event.set()
+                
+                # flush displays on the same cadence the workers send updates at
+                done, pending = wait(pending, timeout=STREAM_UPDATE_INTERVAL)
+                
+                # Render only the newest text per model; Streamlit calls must stay on this thread
+                latest = {}
+                while True:
+                    try:
+                        model, text = updates.get_nowait()
+                    except queue.Empty:
+                        break
+                    latest[model] = text
+                for model, text in latest.items():
+                    streaming_displays[model].markdown(text)
+                
+                for future in done:
+                    collect(future)
+        else:
+            for future in as_completed(futures):
+                collect(future)
+    finally:
+        # A rerun (e.g. the stop button) interrupts this loop, so tell the workers to give up too
+        stop_event.set()
+        # drop models that haven't started yet (shutdown's cancel_futures needs Python 3.9)
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+    
+    # Keep results in the order the models were selected
+    results = st.session_state.results
+    st.session_state.results = {model: results[model] for model in selected_models if model in results}
+    lengths = st.session_state.result_lengths
+    st.session_state.result_lengths = {model: lengths[model] for model in st.session_state.results}
     
     # Clear progress indicators after completion
     progress_bar.empty()
     progress_container.empty()
-    if streaming_display:
-        streaming_display.empty()
-    
-    # Show debug information in an expander
-    with st.expander("Debug Information"):
-        st.code("\n".join(st.session_state.debug_info))
+    if enable_streaming:
+        streaming_section.empty()
     
     # Clear stop button when done
     stop_button_container.empty()
@@ -721,8 +893,39 @@ def process_models(selected_models):
     # Set inference running flag to false
     st.session_state.inference_running = False
 
-def remove_think_blocks(text):
-    return re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL)
+# one response panel, shared by the side-by-side and stacked tabs
+def render_response_panel(model_name: str, prepare_response, stacked: bool = False):
+    # prepare_response removes <think>...</think> blocks if that setting is enabled
+    response = prepare_response(st.session_state.results[model_name])
+    title = f"{model_name} ({len(response)} chars)"
+    if stacked:
+        with st.expander(title, expanded=True):
+            st.markdown(render_response_html(response), unsafe_allow_html=True)
+    else:
+        st.subheader(title)
+        st.markdown(render_response_html(response), unsafe_allow_html=True)
+
+# export files are cached so reruns don't reserialize every response
+@st.cache_data(max_entries=16)
+def results_to_csv(results: dict, response_lengths: dict) -> bytes:
+    import pandas as pd  # only needed for the CSV export
+    results_df = pd.DataFrame(
+        [(model, response, response_lengths[model]) for model, response in results.items()],
+        columns=["Model", "Response", "Length"]
+    )
+    return results_df.to_csv(index=False).encode()
+
+@st.cache_data(max_entries=16)
+def results_to_json(prompt: str, system_prompt: str, temperature: float, results: dict,
+                    response_lengths: dict, evaluation: Optional[str]) -> str:
+    return json.dumps({
+        "prompt": prompt,
+        "system_prompt": system_prompt,
+        "temperature": temperature,
+        "results": results,
+        "response_lengths": response_lengths,
+        "evaluation": evaluation
+    }, indent=2)
 
 if compare_button:
     if not selected_models:
@@ -730,7 +933,8 @@ if compare_button:
     else:
         # Clear previous results
         st.session_state.results = {}
-        st.session_state.current_streaming_text = ""
+        st.session_state.result_lengths = {}
+        st.session_state.error_count = 0
         # Clear previous evaluation result
         st.session_state.evaluation_result = None
         
@@ -761,19 +965,13 @@ if st.session_state.results:
     streaming_section.empty()
     
     # Show response status summary only if there are errors
-    success_count = sum(1 for r in st.session_state.results.values() if not r.startswith("Error"))
-    error_count = len(st.session_state.results) - success_count
+    error_count = st.session_state.error_count
+    success_count = len(st.session_state.results) - error_count
     
     if error_count > 0:
         st.warning(f"{success_count} successful responses, {error_count} errors")
     
     # Create download buttons and add Evaluate button
-    results_df = pd.DataFrame({
-        "Model": list(st.session_state.results.keys()),
-        "Response": list(st.session_state.results.values()),
-        "Length": [len(response) for response in st.session_state.results.values()]
-    })
-    
     # Only show evaluate button if evaluation result is not present
     if not st.session_state.evaluation_result:
         if st.button("Evaluate Responses", key="evaluate_button", use_container_width=True):
@@ -793,27 +991,26 @@ if st.session_state.results:
     # Show evaluation results if available
     if st.session_state.evaluation_result:
         st.subheader("Evaluation Results")
-        st.markdown(f"<div class='model-response'>{html.escape(st.session_state.evaluation_result)}</div>", 
-                  unsafe_allow_html=True)
+        st.markdown(render_response_html(st.session_state.evaluation_result), unsafe_allow_html=True)
     
     col1, col2 = st.columns(2)
     with col1:
         st.download_button(
             label="Download as CSV",
-            data=results_df.to_csv(index=False),
+            data=results_to_csv(st.session_state.results, st.session_state.result_lengths),
             file_name="ollama_model_comparison.csv",
             mime="text/csv",
             use_container_width=True
         )
     
-    json_results = json.dumps({
-        "prompt": user_prompt,
-        "system_prompt": system_prompt,
-        "temperature": temperature,
-        "results": st.session_state.results,
-        "response_lengths": {model: len(response) for model, response in st.session_state.results.items()},
-        "evaluation": st.session_state.evaluation_result
-    }, indent=2)
+    json_results = results_to_json(
+        user_prompt,
+        system_prompt,
+        temperature,
+        st.session_state.results,
+        st.session_state.result_lengths,
+        st.session_state.evaluation_result
+    )
     
     with col2:
         st.download_button(
@@ -832,42 +1029,20 @@ if st.session_state.results:
         models_with_results = [m for m in selected_models if m in st.session_state.results]
         
         if not models_with_results:
-            models_with_results = list(st.session_state.results.keys())
+            models_with_results = [*st.session_state.results]
         
-        if len(models_with_results) == 1:
-            model_name = models_with_results[0]
-            response = st.session_state.results[model_name]
-            # --- Remove <think>...</think> if setting is enabled ---
-            if remove_think_blocks_setting:
-                response = remove_think_blocks(response)
-            st.subheader(f"{model_name} ({len(response)} chars)")
-            st.markdown(f"<div class='model-response'>{html.escape(response)}</div>", 
-                       unsafe_allow_html=True)
-        else:
-            for i in range(0, len(models_with_results), 2):
-                row_cols = st.columns(2)
-                with row_cols[0]:
-                    model_name = models_with_results[i]
-                    response = st.session_state.results[model_name]
-                    if remove_think_blocks_setting:
-                        response = remove_think_blocks(response)
-                    st.subheader(f"{model_name} ({len(response)} chars)")
-                    st.markdown(f"<div class='model-response'>{html.escape(response)}</div>",
-                               unsafe_allow_html=True)
-                if i + 1 < len(models_with_results):
-                    with row_cols[1]:
-                        model_name = models_with_results[i + 1]
-                        response = st.session_state.results[model_name]
-                        if remove_think_blocks_setting:
-                            response = remove_think_blocks(response)
-                        st.subheader(f"{model_name} ({len(response)} chars)")
-                        st.markdown(f"<div class='model-response'>{html.escape(response)}</div>", 
-                                   unsafe_allow_html=True)
+        # Up to two columns, filled alternately
+        cols = st.columns(min(len(models_with_results), 2))
+        for idx, model_name in enumerate(models_with_results):
+            with cols[idx % len(cols)]:
+                render_response_panel(model_name, prepare_response)
     
     with tab2:
         # Stacked view
-        for model, response in st.session_state.results.items():
-            if remove_think_blocks_setting:
-                response = remove_think_blocks(response)
-            with st.expander(f"{model} ({len(response)} chars)", expanded=True):
-                st.markdown(f"<div class='model-response'>{html.escape(response)}</div>", unsafe_allow_html=True)
\ No newline at end of file
+        for model in st.session_state.results:
+            render_response_panel(model, prepare_response, stacked=True)
+
+# Show debug information from the last run in an expander if enabled
+if show_debug_info and st.session_state.debug_info:
+    with st.expander("Debug Information"):
+        st.code("\n".join(st.session_state.debug_info[-SHOWN_DEBUG_INFO_LINES:]))